@@ -1,26 +1,184 @@
-from fastapi import FastAPI, File, UploadFile, Form
-from classic_analysis import ClassicAnalyzer
-from neural_analysis import NeuralAnalyzer
-import pandas as pd
-import numpy as np
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
+from typing import Literal, Optional
 import io
-from sample_analysis import analyze_multiple_excel_files
+import json
 import tempfile
+from contextlib import asynccontextmanager
 from fastapi.responses import StreamingResponse
+import configparser
+import os
+import instrumentation
+import warmup
+from instrumentation import timer
+from compression import CompressionMiddleware
+from serialization import FastJSONResponse, shape_analysis_result
 
-app = FastAPI(title="Combined Analysis API")
+# Анализаторы (pandas, scikit-learn, scipy, openpyxl) импортируются внутри эндпоинтов:
+# это несколько секунд, которые иначе платит каждый запуск воркера и --reload.
+# Эндпоинты анализа — обычные def: FastAPI выполняет их в пуле потоков, поэтому
+# ни ленивый импорт, ни расчёт не блокируют цикл событий и /health
+
+config = configparser.ConfigParser()
+config.read(os.path.join(os.path.dirname(__file__), 'config.cfg'))
+
+@asynccontextmanager
+async def lifespan(app):
+    if config.getboolean('api', 'warmup', fallback=False):
+        warmup.start_background_warmup()
+    yield
+
+app = FastAPI(title="Combined Analysis API", lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+instrumentation.install(app, server_timing=config.getboolean('api', 'server_timing', fallback=False))
+csv_cache_dir = config.get('api', 'csv_cache_dir', fallback='') or None
+search_cache_dir = config.get('api', 'search_cache_dir', fallback='') or None
+
+# Общее хранилище обученных моделей и распарсенных таблиц для всех воркеров (uvicorn --workers N)
+model_store_dir = config.get('api', 'model_store_dir', fallback='') or None
+model_store = None
+if model_store_dir is not None:
+    from model_store import SharedModelStore
+    model_store = SharedModelStore(
+        model_store_dir, max_entries=config.getint('api', 'model_store_max_entries', fallback=64)
+    )
+
+def parse_model_params(model_params):
+    # model_params — JSON с параметрами MLPRegressor, например model_params из /neural-search/
+    try:
+        mlp_params = json.loads(model_params) if model_params else None
+        if mlp_params is not None and not isinstance(mlp_params, dict):
+            raise ValueError
+    except ValueError:
+        raise HTTPException(status_code=400, detail="model_params должен быть JSON-объектом")
+    if mlp_params:
+        from sklearn.neural_network import MLPRegressor
+
+        unknown = sorted(set(mlp_params) - set(MLPRegressor().get_params()))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Неизвестные параметры MLPRegressor: {', '.join(unknown)}")
+        if 'hidden_layer_sizes' in mlp_params:
+            sizes = mlp_params['hidden_layer_sizes']
+            sizes = [sizes] if isinstance(sizes, int) else sizes
+            if not (isinstance(sizes, list) and sizes
+                    and all(isinstance(n, int) and not isinstance(n, bool) and n > 0 for n in sizes)):
+                raise HTTPException(
+                    status_code=400, detail="hidden_layer_sizes должен быть непустым списком положительных целых чисел"
+                )
+    return mlp_params
+
+def analysis_response(analysis_result, layout, offset, limit):
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="offset и limit должны быть неотрицательными")
+    with timer('classic.serialize'):
+        response = FastJSONResponse(shape_analysis_result(analysis_result, layout, offset, limit))
+    return response
+
+def load_results(classic, contents, columns_map):
+    import pandas as pd
+    from model_store import make_key, load_frame, save_frame
+
+    frames = []
+    for data in contents:
+        df = None
+        if model_store is not None:
+            key = make_key('results', data, columns_map)
+            df = load_frame(model_store, key)
+        if df is None:
+            df = classic.load_data(io.BytesIO(data), columns_map)
+            columns = list(columns_map.values())
+            # В хранилище кладутся только числовые колонки, нужные для сопоставления
+            if (model_store is not None and all(c in df.columns for c in columns)
+                    and all(pd.api.types.is_numeric_dtype(df[c]) for c in columns)):
+                df = save_frame(model_store, key, df[columns])
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+def fitted_analyzer(contents, base_params, mlp_params):
+    # Возвращает обученный анализатор и диапазон деформаций обучающих данных;
+    # при включённом хранилище модель обучается один раз на все воркеры
+    import numpy as np
+    from neural_analysis import NeuralAnalyzer
+    from model_store import make_key, load_analyzer, save_analyzer
+
+    if model_store is not None:
+        key = make_key('model', len(contents), *contents, base_params, mlp_params)
+        cached = load_analyzer(model_store, key, cache_dir=csv_cache_dir)
+        if cached is not None:
+            analyzer, meta = cached
+            return analyzer, tuple(meta['eps_range'])
+
+    analyzer = NeuralAnalyzer(cache_dir=csv_cache_dir, model_params=mlp_params)
+    eps_pct, stress = analyzer.load_data([io.BytesIO(data) for data in contents])
+    try:
+        analyzer.fit(eps_pct, stress, base_params)
+    except ValueError as e:
+        # Остальные значения model_params (alpha, solver, ...) MLPRegressor проверяет при обучении
+        raise HTTPException(status_code=400, detail=f"Не удалось обучить модель: {e}")
+    eps_range = (float(np.min(eps_pct)), float(np.max(eps_pct)))
+    if model_store is not None:
+        analyzer, _ = save_analyzer(model_store, key, analyzer, {'eps_range': list(eps_range)})
+    return analyzer, eps_range
+
+def sample_params(
+    polymer_solution_pct: float = Form(20.0),
+    length_mm: float = Form(236.0),
+    mass_mg: float = Form(261.0),
+    fiber_content_pct: float = Form(72.34)
+):
+    # Общие поля формы эндпоинтов нейросети: базовые параметры образца
+    return {
+        'polymer_solution_pct': polymer_solution_pct,
+        'length_mm': length_mm,
+        'mass_mg': mass_mg,
+        'fiber_content_pct': fiber_content_pct
+    }
+
+def sweep_bounds(
+    polymer_solution_pct_min: Optional[float] = Form(None),
+    polymer_solution_pct_max: Optional[float] = Form(None),
+    length_mm_min: Optional[float] = Form(None),
+    length_mm_max: Optional[float] = Form(None),
+    mass_mg_min: Optional[float] = Form(None),
+    mass_mg_max: Optional[float] = Form(None),
+    fiber_content_pct_min: Optional[float] = Form(None),
+    fiber_content_pct_max: Optional[float] = Form(None)
+):
+    # Общие поля формы /neural-sweep/ и /virtual-validation/: границы плана
+    return {
+        'polymer_solution_pct': (polymer_solution_pct_min, polymer_solution_pct_max),
+        'length_mm': (length_mm_min, length_mm_max),
+        'mass_mg': (mass_mg_min, mass_mg_max),
+        'fiber_content_pct': (fiber_content_pct_min, fiber_content_pct_max)
+    }
+
+def sweep_request(base_params, bounds, design, n_samples, levels, seed, num_points):
+    # Проверка параметров плана и сам план; ошибки превращаются в 400 до начала ответа
+    from parameter_sweep import make_design, sweep_ranges
+
+    if min(n_samples, levels, num_points) < 1 or seed < 0:
+        raise HTTPException(status_code=400, detail="n_samples, levels и num_points должны быть положительными, seed — неотрицательным")
+    try:
+        return make_design(design, sweep_ranges(base_params, bounds), n_samples=n_samples, levels=levels, seed=seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/health")
+def health():
+    return {'status': 'ok', 'warmup': warmup.status()}
 
 @app.post("/excel-sample-analysis/")
-async def excel_sample_analysis(
+def excel_sample_analysis(
     excel_files: list[UploadFile] = File(...),
     skip_initial_rows: int = Form(3)
 ):
+    from sample_analysis import analyze_multiple_excel_files
+
     results = {}
     with tempfile.TemporaryDirectory() as tmpdirname:
         for excel_file in excel_files:
             file_location = f"{tmpdirname}/{excel_file.filename}"
             with open(file_location, "wb") as f:
-                f.write(await excel_file.read())
+                f.write(excel_file.file.read())
             results[excel_file.filename] = analyze_multiple_excel_files(
                 [file_location], skip_initial_rows=skip_initial_rows
             )[file_location]
@@ -28,45 +186,44 @@ async def excel_sample_analysis(
 
 # Эндпоинт для классического анализа
 @app.post("/classic-analysis/")
-async def classic_analysis(
+def classic_analysis(
     real_files: list[UploadFile] = File(...),
     virt_files: list[UploadFile] = File(...),
     error_threshold: int = Form(15),
-    pair_only: bool = Form(False)
+    pair_only: bool = Form(False),
+    layout: Literal['rows', 'columnar'] = Form('rows'),
+    offset: int = Form(0),
+    limit: Optional[int] = Form(None)
 ):
-    print(f"pair_only: {pair_only}") 
+    from classic_analysis import ClassicAnalyzer, REAL_COLUMNS, VIRT_COLUMNS
+
     analyzer = ClassicAnalyzer(error_threshold=error_threshold, pair_only=pair_only)
 
-    real_buffers = [io.BytesIO(await f.read()) for f in real_files]
-    virt_buffers = [io.BytesIO(await f.read()) for f in virt_files]
+    real_contents = [f.file.read() for f in real_files]
+    virt_contents = [f.file.read() for f in virt_files]
 
-    analysis_result = analyzer.full_analysis(real_buffers, virt_buffers)
+    with timer('classic.load_real'):
+        df_real = load_results(analyzer, real_contents, REAL_COLUMNS)
+    with timer('classic.load_virt'):
+        df_virt = load_results(analyzer, virt_contents, VIRT_COLUMNS)
+    analysis_result = analyzer.analyze_frames(df_virt, df_real)
 
-    return analysis_result
+    return analysis_response(analysis_result, layout, offset, limit)
 
 # Эндпоинт для анализа с нейросетью
 @app.post("/neural-analysis/")
-async def neural_analysis_multiple_samples(
+def neural_analysis_multiple_samples(
     csv_files: list[UploadFile] = File(...),
-    polymer_solution_pct: float = Form(20.0),
-    length_mm: float = Form(236.0),
-    mass_mg: float = Form(261.0),
-    fiber_content_pct: float = Form(72.34),
-    num_samples: int = Form(3)
+    base_params: dict = Depends(sample_params),
+    num_samples: int = Form(3),
+    model_params: str = Form('')
 ):
-    analyzer = NeuralAnalyzer()
-
-    csv_buffers = [io.BytesIO(await f.read()) for f in csv_files]
-    eps_pct, stress = analyzer.load_data(csv_buffers)
+    import numpy as np
 
-    base_params = {
-        'polymer_solution_pct': polymer_solution_pct,
-        'length_mm': length_mm,
-        'mass_mg': mass_mg,
-        'fiber_content_pct': fiber_content_pct
-    }
+    mlp_params = parse_model_params(model_params)
+    csv_contents = [f.file.read() for f in csv_files]
 
-    analyzer.fit(eps_pct, stress, base_params)
+    analyzer, eps_range = fitted_analyzer(csv_contents, base_params, mlp_params)
 
     params_list = []
     for _ in range(num_samples):
@@ -77,7 +234,7 @@ async def neural_analysis_multiple_samples(
 
     excel_buffer = analyzer.generate_multiple_samples(
         params_list=params_list,
-        eps_range=(np.min(eps_pct), np.max(eps_pct)),
+        eps_range=eps_range,
         num_points=300
     )
 
@@ -85,4 +242,107 @@ async def neural_analysis_multiple_samples(
         excel_buffer,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=multiple_predicted_samples.xlsx"}
-    )
\ No newline at end of file
+    )
+
+# Эндпоинт для подбора гиперпараметров нейросети
+@app.post("/neural-search/")
+def neural_hyperparameter_search(
+    csv_files: list[UploadFile] = File(...),
+    base_params: dict = Depends(sample_params),
+    mode: Literal['grid', 'random', 'halving'] = Form('random'),
+    n_iter: int = Form(20),
+    mse_target: Optional[float] = Form(None),
+    n_jobs: Optional[int] = Form(None)
+):
+    from neural_analysis import NeuralAnalyzer
+    from neural_search import HyperparameterSearch
+
+    try:
+        search = HyperparameterSearch(
+            mode=mode, n_iter=n_iter, mse_target=mse_target, n_jobs=n_jobs, cache_dir=search_cache_dir
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    csv_buffers = [io.BytesIO(f.file.read()) for f in csv_files]
+    eps_pct, stress = NeuralAnalyzer(cache_dir=csv_cache_dir).load_data(csv_buffers)
+    return search.run(eps_pct, stress, base_params)
+
+# Эндпоинт для массовой генерации виртуальных образцов по плану эксперимента
+@app.post("/neural-sweep/")
+def neural_parameter_sweep(
+    csv_files: list[UploadFile] = File(...),
+    base_params: dict = Depends(sample_params),
+    bounds: dict = Depends(sweep_bounds),
+    design: Literal['grid', 'lhs'] = Form('lhs'),
+    n_samples: int = Form(1000),
+    levels: int = Form(10),
+    seed: int = Form(0),
+    batch_size: int = Form(256),
+    num_points: int = Form(300),
+    model_params: str = Form('')
+):
+    import numpy as np
+    from parameter_sweep import stream_sweep_csv, MAX_BATCH_SIZE
+
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"batch_size должен быть от 1 до {MAX_BATCH_SIZE}")
+    sweep_design = sweep_request(base_params, bounds, design, n_samples, levels, seed, num_points)
+
+    mlp_params = parse_model_params(model_params)
+    csv_contents = [f.file.read() for f in csv_files]
+    analyzer, eps_range = fitted_analyzer(csv_contents, base_params, mlp_params)
+    eps_test = np.linspace(eps_range[0], eps_range[1], num_points)
+
+    return StreamingResponse(
+        stream_sweep_csv(analyzer, sweep_design, eps_test, batch_size=batch_size),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": "attachment; filename=virtual_sweep.csv",
+            "X-Sweep-Size": str(sweep_design.size)
+        }
+    )
+
+# Эндпоинт для проверки виртуальных образцов на реальных без промежуточных Excel-файлов
+@app.post("/virtual-validation/")
+def virtual_validation(
+    real_files: list[UploadFile] = File(...),
+    csv_files: list[UploadFile] = File(...),
+    base_params: dict = Depends(sample_params),
+    bounds: dict = Depends(sweep_bounds),
+    design: Literal['grid', 'lhs'] = Form('lhs'),
+    n_samples: int = Form(200),
+    levels: int = Form(5),
+    seed: int = Form(0),
+    num_points: int = Form(300),
+    density_g_cm3: Optional[float] = Form(None),
+    error_threshold: int = Form(15),
+    pair_only: bool = Form(False),
+    model_params: str = Form(''),
+    layout: Literal['rows', 'columnar'] = Form('rows'),
+    offset: int = Form(0),
+    limit: Optional[int] = Form(None)
+):
+    import numpy as np
+    from classic_analysis import ClassicAnalyzer, REAL_COLUMNS
+    from virtual_validation import validate_against_real
+
+    if density_g_cm3 is not None and density_g_cm3 <= 0:
+        raise HTTPException(status_code=400, detail="density_g_cm3 должна быть положительной")
+    sweep_design = sweep_request(base_params, bounds, design, n_samples, levels, seed, num_points)
+
+    classic = ClassicAnalyzer(error_threshold=error_threshold, pair_only=pair_only)
+    mlp_params = parse_model_params(model_params)
+    real_contents = [f.file.read() for f in real_files]
+    with timer('classic.load_real'):
+        df_real = load_results(classic, real_contents, REAL_COLUMNS)
+
+    csv_contents = [f.file.read() for f in csv_files]
+    analyzer, eps_range = fitted_analyzer(csv_contents, base_params, mlp_params)
+    eps_test = np.linspace(eps_range[0], eps_range[1], num_points)
+
+    analysis_result = validate_against_real(
+        classic, analyzer, sweep_design, eps_test, df_real, density_g_cm3=density_g_cm3
+    )
+
+    return analysis_response(analysis_result, layout, offset, limit)
\ No newline at end of file
@@ -0,0 +1,113 @@
+import io
+import numpy as np
+import pandas as pd
+
+REAL_COLUMNS = {
+    'fiber_percent': 'Содержание волокна, %',
+    'E_modulus_GPa': 'Eмод',
+    'Fmax_N': 'Fmax',
+    'strength_MPa': 'sM',
+    'elongation_percent': 'dL при Fмакс',
+    'polymer_percent': 'Раствор полимера,%'
+}
+
+VIRT_COLUMNS = {
+    'fiber_percent': 'Содержание волокна, %',
+    'E_modulus_GPa': 'Eмод, Гпа',
+    'Fmax_N': 'Fmax, Н',
+    'strength_MPa': 'sM, МПа',
+    'elongation_percent': 'dL при Fмакс %',
+    'polymer_percent': 'Раствор полимера,%'
+}
+
+UNITS = {
+    'fiber_percent': '%',
+    'E_modulus_GPa': 'ГПа',
+    'Fmax_N': 'Н',
+    'strength_MPa': 'МПа',
+    'elongation_percent': '%',
+    'polymer_percent': '%'
+}
+
+
+def synthetic_properties(n_rows, seed=0, polymer_values=(15.0, 20.0, 25.0), noise=0.02):
+    # Все свойства зависят от содержания волокна с небольшим шумом,
+    # чтобы реальные и виртуальные наборы действительно сопоставлялись
+    rng = np.random.default_rng(seed)
+    fiber = rng.uniform(60.0, 80.0, n_rows)
+    VF = fiber / 100.0
+    E_modulus = (240.0 * VF + 2.7 * (1 - VF)) * 0.75 * rng.normal(1.0, noise, n_rows)
+    elongation = (0.6 + fiber / 100.0) * rng.normal(1.0, noise, n_rows)
+    strength = E_modulus * elongation * 9.0 * rng.normal(1.0, noise, n_rows)
+    return pd.DataFrame({
+        'fiber_percent': fiber,
+        'E_modulus_GPa': E_modulus,
+        'Fmax_N': strength * 0.4 * rng.normal(1.0, noise, n_rows),
+        'strength_MPa': strength,
+        'elongation_percent': elongation,
+        'polymer_percent': rng.choice(polymer_values, n_rows)
+    })
+
+
+def make_results_workbook(n_rows, schema='real', seed=0, polymer_values=(15.0, 20.0, 25.0)):
+    # Лист 'Результаты' в формате, который читает ClassicAnalyzer.load_data:
+    # строка заголовков, строка единиц измерения, затем данные
+    if schema not in ('real', 'virt'):
+        raise ValueError(f"Неизвестная схема '{schema}', ожидается 'real' или 'virt'")
+    columns = REAL_COLUMNS if schema == 'real' else VIRT_COLUMNS
+    df = synthetic_properties(n_rows, seed, polymer_values)
+    units = pd.DataFrame([{columns[key]: UNITS[key] for key in columns}])
+    sheet = pd.concat([units, df.rename(columns=columns)], ignore_index=True)
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        sheet.to_excel(writer, sheet_name='Результаты', index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def synthetic_curve(n_points, seed=0, fiber_content_pct=72.34, break_drop=True):
+    rng = np.random.default_rng(seed)
+    eps_peak = rng.uniform(1.0, 1.5)
+    n_rise = int(n_points * 0.9) if break_drop else n_points
+    eps_rise = np.linspace(0.0, eps_peak, n_rise)
+    VF = fiber_content_pct / 100.0
+    E_eff = 240e3 * VF + 2.7e3 * (1 - VF)
+    stress_rise = E_eff * eps_rise / 100.0 * (1 - 0.08 * (eps_rise / eps_peak) ** 2)
+    if not break_drop:
+        eps, stress = eps_rise, stress_rise
+    else:
+        # Разрушение: напряжение падает, деформация почти не растёт
+        n_drop = n_points - n_rise
+        eps_drop = eps_peak + np.linspace(0.0, 0.02, n_drop + 1)[1:]
+        stress_drop = np.linspace(stress_rise[-1], stress_rise[-1] * 0.05, n_drop + 1)[1:]
+        eps, stress = np.concatenate([eps_rise, eps_drop]), np.concatenate([stress_rise, stress_drop])
+    stress = stress + rng.normal(0.0, stress.max() * 0.002, n_points)
+    return eps, stress
+
+
+def make_curve_csv(n_points, seed=0, fiber_content_pct=72.34):
+    # CSV в формате tests/for_neural_analysis/33.csv: разделитель ';', десятичная запятая
+    eps, stress = synthetic_curve(n_points, seed, fiber_content_pct)
+    df = pd.DataFrame({'Deformation': eps, 'Standard_Stress': stress})
+    return io.BytesIO(df.to_csv(sep=';', decimal=',', index=False).encode('utf-8'))
+
+
+def make_sample_workbook(n_sheets, n_points, seed=0, skip_initial_rows=3, bad_fraction=0.2):
+    # Многолистовая книга для analyze_excel_file: на каждом листе skip_initial_rows
+    # строк шапки, затем две колонки — деформация и напряжение
+    rng = np.random.default_rng(seed)
+    header = [['Образец', ''], ['Деформация', 'Напряжение'], ['%', 'МПа']]
+    header = (header + [['', '']] * skip_initial_rows)[:skip_initial_rows]
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for idx in range(1, n_sheets + 1):
+            eps, stress = synthetic_curve(n_points, seed=seed + idx)
+            if rng.random() < bad_fraction:
+                # Плохой образец: деформация в конце откатывается назад
+                eps[-1] = eps[0]
+            rows = [list(row) for row in header] + np.column_stack([eps, stress]).tolist()
+            pd.DataFrame(rows).to_excel(writer, sheet_name=f"Sample_{idx}", header=False, index=False)
+    buffer.seek(0)
+    return buffer
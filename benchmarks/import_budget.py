@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Эти модули должны импортироваться лениво, внутри эндпоинтов или прогрева
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy', 'openpyxl', 'numpy')
+
+DEFAULT_BUDGET_S = 1.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module='api', repeat=5):
+    # Каждый замер в новом интерпретаторе: иначе модули уже лежат в sys.modules
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        'module': module,
+        'times_s': [s['seconds'] for s in samples],
+        'median_s': statistics.median(s['seconds'] for s in samples),
+        'heavy_imported': samples[-1]['heavy']
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка бюджета времени импорта API")
+    parser.add_argument('--module', default='api')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_S, help="допустимое время импорта, с")
+    args = parser.parse_args(argv)
+
+    result = measure_import(args.module, args.repeat)
+    print(f"import {result['module']}: {result['median_s']:.3f} s (бюджет {args.budget:.3f} s)")
+
+    failed = False
+    if result['median_s'] > args.budget:
+        print("Бюджет времени импорта превышен")
+        failed = True
+    if result['heavy_imported']:
+        print(f"При импорте загружены тяжёлые модули: {', '.join(result['heavy_imported'])}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
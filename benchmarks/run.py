@@ -0,0 +1,235 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from classic_analysis import ClassicAnalyzer
+from neural_analysis import NeuralAnalyzer
+from sample_analysis import analyze_multiple_excel_files
+from benchmarks.generators import make_results_workbook, make_sample_workbook, make_curve_csv
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+SIZES = {
+    'small': {
+        'real_rows': 200, 'virt_rows': 50,
+        'sample_files': 2, 'sample_sheets': 5, 'sheet_points': 500,
+        'csv_files': 1, 'csv_points': 2000, 'predict_samples': 20
+    },
+    'medium': {
+        'real_rows': 1000, 'virt_rows': 200,
+        'sample_files': 4, 'sample_sheets': 10, 'sheet_points': 2000,
+        'csv_files': 2, 'csv_points': 10000, 'predict_samples': 100
+    },
+    'large': {
+        'real_rows': 5000, 'virt_rows': 1000,
+        'sample_files': 8, 'sample_sheets': 20, 'sheet_points': 5000,
+        'csv_files': 4, 'csv_points': 50000, 'predict_samples': 500
+    }
+}
+
+BASE_PARAMS = {
+    'polymer_solution_pct': 20.0,
+    'length_mm': 236.0,
+    'mass_mg': 261.0,
+    'fiber_content_pct': 72.34
+}
+
+
+def bench_classic_full_analysis(cfg, seed, tmpdir):
+    real_bytes = make_results_workbook(cfg['real_rows'], 'real', seed=seed).getvalue()
+    virt_bytes = make_results_workbook(cfg['virt_rows'], 'virt', seed=seed + 1).getvalue()
+
+    def run():
+        # Буферы создаются заново: pd.read_excel дочитывает их до конца
+        ClassicAnalyzer(error_threshold=15).full_analysis([io.BytesIO(real_bytes)], [io.BytesIO(virt_bytes)])
+    return run
+
+
+def bench_sample_analysis(cfg, seed, tmpdir):
+    paths = []
+    for idx in range(cfg['sample_files']):
+        path = os.path.join(tmpdir, f"samples_{idx}.xlsx")
+        with open(path, 'wb') as f:
+            f.write(make_sample_workbook(cfg['sample_sheets'], cfg['sheet_points'], seed=seed + idx).getvalue())
+        paths.append(path)
+
+    def run():
+        analyze_multiple_excel_files(paths, skip_initial_rows=3)
+    return run
+
+
+def _curve_bytes(cfg, seed):
+    return [make_curve_csv(cfg['csv_points'], seed=seed + idx).getvalue() for idx in range(cfg['csv_files'])]
+
+
+def bench_neural_load_data(cfg, seed, tmpdir):
+    csv_bytes = _curve_bytes(cfg, seed)
+
+    def run():
+        NeuralAnalyzer().load_data([io.BytesIO(b) for b in csv_bytes])
+    return run
+
+
+def bench_neural_fit(cfg, seed, tmpdir):
+    eps_pct, stress = NeuralAnalyzer().load_data([io.BytesIO(b) for b in _curve_bytes(cfg, seed)])
+
+    def run():
+        NeuralAnalyzer().fit(eps_pct, stress, BASE_PARAMS)
+    return run
+
+
+def bench_neural_predict(cfg, seed, tmpdir):
+    analyzer = NeuralAnalyzer()
+    eps_pct, stress = analyzer.load_data([io.BytesIO(b) for b in _curve_bytes(cfg, seed)])
+    analyzer.fit(eps_pct, stress, BASE_PARAMS)
+    rng = np.random.default_rng(seed)
+    params_list = []
+    for _ in range(cfg['predict_samples']):
+        params = BASE_PARAMS.copy()
+        params['fiber_content_pct'] += rng.uniform(-2.0, 2.0)
+        params['polymer_solution_pct'] += rng.uniform(-1.0, 1.0)
+        params_list.append(params)
+    eps_range = (np.min(eps_pct), np.max(eps_pct))
+
+    def run():
+        for params in params_list:
+            analyzer.predict_curve(eps_range, params, num_points=300)
+    return run
+
+
+BENCHMARKS = {
+    'classic.full_analysis': bench_classic_full_analysis,
+    'sample.analyze_multiple_excel_files': bench_sample_analysis,
+    'neural.load_data': bench_neural_load_data,
+    'neural.fit': bench_neural_fit,
+    'neural.predict': bench_neural_predict
+}
+
+
+def measure(run, repeat, memory=True):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    result = {
+        'times_s': times,
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'mean_s': statistics.fmean(times)
+    }
+    if memory:
+        # Отдельный прогон: tracemalloc замедляет выполнение и исказил бы время
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result['peak_memory_mb'] = peak / 2 ** 20
+    return result
+
+
+def run_benchmarks(size='small', repeat=3, seed=0, names=None, memory=True):
+    cfg = SIZES[size]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, setup in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            print(f"{name} ...", end=' ', flush=True)
+            results[name] = measure(setup(cfg, seed, tmpdir), repeat, memory)
+            print(f"{results[name]['median_s']:.3f} s")
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'size': size,
+            'repeat': repeat,
+            'seed': seed,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__
+        },
+        'config': cfg,
+        'benchmarks': results
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    if results['meta']['size'] != baseline['meta']['size']:
+        print(f"Внимание: размер прогона '{results['meta']['size']}' "
+              f"отличается от базового '{baseline['meta']['size']}'")
+
+    rows, regressions = [], []
+    for name, current in results['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            rows.append((name, current['median_s'], None, None, 'new'))
+            continue
+        ratio = current['median_s'] / base['median_s']
+        if ratio > 1 + tolerance:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, current['median_s'], base['median_s'], ratio, status))
+
+    print(f"{'benchmark':<40}{'current, s':>12}{'baseline, s':>13}{'ratio':>8}  status")
+    for name, cur, base, ratio, status in rows:
+        base_str = f"{base:.3f}" if base is not None else '-'
+        ratio_str = f"{ratio:.2f}" if ratio is not None else '-'
+        print(f"{name:<40}{cur:>12.3f}{base_str:>13}{ratio_str:>8}  {status}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки классического, нейросетевого и Excel-анализа")
+    parser.add_argument('--size', choices=sorted(SIZES), default='small')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="запустить только указанные бенчмарки")
+    parser.add_argument('--no-memory', action='store_true', help="не измерять пиковую память")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="сохранить результаты как новую базу")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="допустимое замедление относительно базы")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.size, args.repeat, args.seed, args.only, not args.no_memory)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены в {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"База сохранена в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"База {args.baseline} не найдена, сравнение пропущено (используйте --save-baseline)")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,31 @@ import numpy as np
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from scipy.stats import ttest_rel
 import io
+from instrumentation import timer
+
+REAL_COLUMNS = {
+    'Содержание волокна, %': 'fiber_percent',
+    'Eмод': 'E_modulus_GPa',
+    'Fmax': 'Fmax_N',
+    'sM': 'strength_MPa',
+    'dL при Fмакс': 'elongation_percent',
+    'Раствор полимера,%': 'polymer_percent'
+}
+
+VIRT_COLUMNS = {
+    'Содержание волокна, %': 'fiber_percent',
+    'Eмод, Гпа': 'E_modulus_GPa',
+    'Fmax, Н': 'Fmax_N',
+    'sM, МПа': 'strength_MPa',
+    'dL при Fмакс %': 'elongation_percent',
+    'Раствор полимера,%': 'polymer_percent'
+}
+
+# Поля таблицы сопоставленных экспериментов (calculate_metrics)
+MATCH_TABLE_FIELDS = [
+    'virt_polymer%', 'real_polymer%', 'virt_fiber%', 'real_fiber%',
+    'virt_E_modulus_GPa', 'real_E_modulus_GPa', 'diff'
+]
 
 class ClassicAnalyzer:
     def __init__(self, error_threshold=15, pair_only=False):
@@ -105,29 +130,22 @@ class ClassicAnalyzer:
         return evaluation
 
     def full_analysis(self, real_buffers, virt_buffers):
-        cols_real = {
-            'Содержание волокна, %': 'fiber_percent',
-            'Eмод': 'E_modulus_GPa',
-            'Fmax': 'Fmax_N',
-            'sM': 'strength_MPa',
-            'dL при Fмакс': 'elongation_percent',
-            'Раствор полимера,%': 'polymer_percent'
-        }
-        cols_virt = {
-            'Содержание волокна, %': 'fiber_percent',
-            'Eмод, Гпа': 'E_modulus_GPa',
-            'Fmax, Н': 'Fmax_N',
-            'sM, МПа': 'strength_MPa',
-            'dL при Fмакс %': 'elongation_percent',
-            'Раствор полимера,%': 'polymer_percent'
-        }
-        df_real = pd.concat([self.load_data(f, cols_real) for f in real_buffers], ignore_index=True)
-        df_virt = pd.concat([self.load_data(f, cols_virt) for f in virt_buffers], ignore_index=True)
+        with timer('classic.load_real'):
+            df_real = pd.concat([self.load_data(f, REAL_COLUMNS) for f in real_buffers], ignore_index=True)
+        with timer('classic.load_virt'):
+            df_virt = pd.concat([self.load_data(f, VIRT_COLUMNS) for f in virt_buffers], ignore_index=True)
+        return self.analyze_frames(df_virt, df_real)
 
-        matched = self.match_data(df_virt, df_real)
-        results_metrics, matched_experiments, metrics_raw = self.calculate_metrics(matched)
-        stats = self.statistical_tests(metrics_raw)
-        evals = self.evaluate_metrics(results_metrics)
+    def analyze_frames(self, df_virt, df_real):
+        # Этапы анализа над уже загруженными DataFrame (колонки как после load_data)
+        with timer('classic.match_data'):
+            matched = self.match_data(df_virt, df_real)
+        with timer('classic.calculate_metrics'):
+            results_metrics, matched_experiments, metrics_raw = self.calculate_metrics(matched)
+        with timer('classic.statistical_tests'):
+            stats = self.statistical_tests(metrics_raw)
+        with timer('classic.evaluate_metrics'):
+            evals = self.evaluate_metrics(results_metrics)
 
         return {
             'matched_count':       len(matched),
@@ -0,0 +1,104 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+# brotli необязателен: без него сжимаем только gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Уже сжатые форматы (xlsx — это zip) повторно не сжимаем
+EXCLUDED_CONTENT_TYPES = ('application/vnd.openxmlformats', 'application/zip', 'application/gzip', 'image/')
+
+
+def negotiate_encoding(accept_encoding):
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        self.encoding = encoding
+
+    def compress(self, data, final):
+        if self.encoding == 'br':
+            out = self._obj.process(data)
+            return out + (self._obj.finish() if final else self._obj.flush())
+        out = self._obj.compress(data)
+        # Для потоковых ответов сбрасываем буфер после каждого куска, чтобы данные уходили сразу
+        return out + self._obj.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {'start': None, 'compressor': None, 'passthrough': False}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                state['start'] = message
+                return
+            if message['type'] != 'http.response.body' or state['passthrough']:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if state['compressor'] is None:
+                start = state['start']
+                headers = MutableHeaders(raw=start['headers'])
+                content_type = headers.get('content-type', '')
+                if ('content-encoding' in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    state['passthrough'] = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                state['compressor'] = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                data = state['compressor'].compress(body, final=not more_body)
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                if more_body:
+                    if 'content-length' in headers:
+                        del headers['content-length']
+                else:
+                    headers['Content-Length'] = str(len(data))
+                await send(start)
+                await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+                return
+
+            data = state['compressor'].compress(body, final=not more_body)
+            await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+        await self.app(scope, receive, send_wrapper)
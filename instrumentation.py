@@ -0,0 +1,258 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Тайминги стадий текущего запроса (для заголовка Server-Timing)
+_request_timings = ContextVar('request_timings', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: ожидались метки {self.labelnames}, получены {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        if amount < 0:
+            raise ValueError("Счётчик может только увеличиваться")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state['count'] if state else 0
+
+    def _render_sample(self, key, state):
+        lines = []
+        for bound, cumulative in zip(self.buckets, state['buckets']):
+            labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Метрика '{metric.name}' уже зарегистрирована")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'analysis_stage_duration_seconds', 'Время выполнения стадий анализа', ('stage',)
+))
+STAGE_CALLS = REGISTRY.register(Counter(
+    'analysis_stage_calls_total', 'Количество вызовов стадий анализа', ('stage', 'status')
+))
+STAGES_IN_FLIGHT = REGISTRY.register(Gauge(
+    'analysis_stage_in_flight', 'Стадии анализа, выполняющиеся в данный момент', ('stage',)
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запросов', ('method', 'path', 'status')
+))
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    'http_requests_total', 'Количество HTTP-запросов', ('method', 'path', 'status')
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'http_requests_in_flight', 'HTTP-запросы, обрабатываемые в данный момент', ('method',)
+))
+
+
+@contextmanager
+def timer(stage):
+    # Работает и как контекстный менеджер, и как декоратор
+    timings = _request_timings.get()
+    STAGES_IN_FLIGHT.inc(stage=stage)
+    status = 'error'
+    start = time.perf_counter()
+    try:
+        yield
+        status = 'ok'
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGES_IN_FLIGHT.dec(stage=stage)
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        STAGE_CALLS.inc(stage=stage, status=status)
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def format_server_timing(timings, total=None):
+    # Повторяющиеся стадии (например, чтение нескольких файлов) суммируются
+    durations = {}
+    for stage, elapsed in timings:
+        durations[stage] = durations.get(stage, 0.0) + elapsed
+    entries = [f'{stage};dur={elapsed * 1000:.1f}' for stage, elapsed in durations.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def install(app, server_timing=False, metrics_path='/metrics'):
+    from fastapi import Request
+    from fastapi.responses import Response
+
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        if request.url.path == metrics_path:
+            return await call_next(request)
+
+        method = request.method
+        token = _request_timings.set([])
+        REQUESTS_IN_FLIGHT.inc(method=method)
+        start = time.perf_counter()
+
+        def finish(status):
+            REQUESTS_IN_FLIGHT.dec(method=method)
+            # Шаблон маршрута вместо сырого пути, чтобы не плодить метки
+            route = request.scope.get('route')
+            path = getattr(route, 'path', 'unmatched')
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, path=path, status=status)
+            REQUESTS_TOTAL.inc(method=method, path=path, status=status)
+
+        try:
+            response = await call_next(request)
+        except BaseException:
+            finish('500')
+            raise
+        finally:
+            timings = _request_timings.get()
+            _request_timings.reset(token)
+
+        # call_next возвращает ответ, как только готовы заголовки; тело (поток CSV,
+        # Excel) ещё не сгенерировано, поэтому запрос завершается вместе с телом
+        status = str(response.status_code)
+        body_iterator = response.body_iterator
+
+        async def observed_body():
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                finish(status)
+
+        response.body_iterator = observed_body()
+        if server_timing:
+            # Заголовок уходит до тела, поэтому total — время до начала ответа
+            response.headers['Server-Timing'] = format_server_timing(timings, total=time.perf_counter() - start)
+        return response
+
+    @app.get(metrics_path, include_in_schema=False)
+    def metrics():
+        return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    return app
@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import atexit
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+
+MANIFEST = 'manifest.json'
+ARRAYS = 'arrays.npy'
+REFS = 'refs'
+
+
+def make_key(kind, *parts):
+    # Ключ по содержимому: байты файлов и JSON-представление параметров
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\0')
+    return f"{kind}-{digest.hexdigest()}"
+
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        # На Windows os.kill(pid, 0) завершает процесс, поэтому считаем держателя живым
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedModelStore:
+    # Общий для всех воркеров uvicorn каталог: каждая запись — один файл .npy со всеми
+    # массивами подряд и manifest.json с формами и метаданными. Массивы читаются через
+    # np.load(mmap_mode='r'), так что страницы в памяти делят все процессы.
+    # Каждый процесс, держащий запись, создаёт файл refs/<pid>; запись удаляется
+    # при вытеснении, только когда живых держателей не осталось
+    def __init__(self, root, max_entries=64, max_local=8):
+        if max_entries < 1:
+            raise ValueError("max_entries должен быть не меньше 1")
+        self.root = root
+        self.max_entries = max_entries
+        self.max_local = max_local
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        os.makedirs(root, exist_ok=True)
+        atexit.register(self.close)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def _ref_path(self, key, pid=None):
+        return os.path.join(self._entry_dir(key), REFS, str(pid or self._pid))
+
+    def holders(self, key):
+        refs_dir = os.path.join(self._entry_dir(key), REFS)
+        try:
+            names = os.listdir(refs_dir)
+        except FileNotFoundError:
+            return []
+        alive = []
+        for name in names:
+            if not name.isdigit():
+                continue
+            if _pid_alive(int(name)):
+                alive.append(int(name))
+            else:
+                # Воркер упал, не освободив запись
+                try:
+                    os.remove(os.path.join(refs_dir, name))
+                except FileNotFoundError:
+                    pass
+        return alive
+
+    def _open(self, key):
+        entry = self._entry_dir(key)
+        # Сначала регистрируемся держателем, потом читаем. Каталог refs/ создаётся
+        # вместе с записью, поэтому вытесненная запись здесь не воскресает
+        try:
+            open(self._ref_path(key), 'x').close()
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            return None
+        try:
+            with open(os.path.join(entry, MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+            flat = np.load(os.path.join(entry, ARRAYS), mmap_mode='r')
+            # Время последнего использования — для вытеснения самых старых записей.
+            # Заодно проверяем, что запись не вытеснили до появления нашей ссылки
+            os.utime(os.path.join(entry, MANIFEST))
+        except (FileNotFoundError, ValueError):
+            self._drop_ref(key)
+            return None
+        arrays = {}
+        for name, (offset, shape) in manifest['arrays'].items():
+            size = int(np.prod(shape))
+            arrays[name] = np.asarray(flat[offset:offset + size]).reshape(shape)
+        return arrays, manifest['meta']
+
+    def get(self, key):
+        with self._lock:
+            if key in self._local:
+                self._local.move_to_end(key)
+                return self._local[key]
+        entry = self._open(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, arrays, meta):
+        entry = self._entry_dir(key)
+        arrays = {name: np.asarray(value, dtype=np.float64) for name, value in arrays.items()}
+        # Метаданные в том же виде, в каком их вернёт get после чтения manifest.json
+        meta = json.loads(json.dumps(meta, default=str))
+        if not os.path.exists(os.path.join(entry, MANIFEST)):
+            layout, chunks, offset = {}, [], 0
+            for name, value in arrays.items():
+                layout[name] = (offset, list(value.shape))
+                chunks.append(value.ravel())
+                offset += value.size
+            flat = np.concatenate(chunks) if chunks else np.empty(0)
+
+            # Запись собирается во временном каталоге и публикуется одним rename
+            tmp_dir = tempfile.mkdtemp(dir=self.root, prefix='.tmp-')
+            os.makedirs(os.path.join(tmp_dir, REFS))
+            np.save(os.path.join(tmp_dir, ARRAYS), flat)
+            with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+                json.dump({'arrays': layout, 'meta': meta}, f)
+            try:
+                os.rename(tmp_dir, entry)
+            except OSError:
+                # Другой воркер успел записать ту же запись
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            self.cleanup(keep=key)
+        stored = self.get(key)
+        if stored is None:
+            # Запись успел вытеснить другой воркер — отдаём то, что только что записали
+            return arrays, meta
+        return stored
+
+    def _remember(self, key, entry):
+        evicted = []
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local:
+                evicted.append(self._local.popitem(last=False)[0])
+        for old_key in evicted:
+            self._drop_ref(old_key)
+
+    def _drop_ref(self, key):
+        try:
+            os.remove(self._ref_path(key))
+        except FileNotFoundError:
+            pass
+
+    def release(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+        self._drop_ref(key)
+
+    def entries(self):
+        keys = []
+        for name in os.listdir(self.root):
+            manifest = os.path.join(self.root, name, MANIFEST)
+            if not name.startswith('.') and os.path.exists(manifest):
+                keys.append((os.path.getmtime(manifest), name))
+        return [name for _, name in sorted(keys)]
+
+    def cleanup(self, keep=None):
+        # Вытесняем самые давно использованные записи без живых держателей;
+        # keep — только что записанная запись, которую вытеснять нельзя
+        keys = [key for key in self.entries() if key != keep]
+        limit = self.max_entries - (keep is not None)
+        removed = []
+        for key in keys[:max(0, len(keys) - limit)]:
+            if self.holders(key):
+                continue
+            trash = os.path.join(self.root, f".trash-{key}-{time.time_ns()}")
+            try:
+                os.rename(self._entry_dir(key), trash)
+            except OSError:
+                continue
+            # Уже отображённые в память файлы остаются доступны до закрытия (POSIX)
+            shutil.rmtree(trash, ignore_errors=True)
+            removed.append(key)
+        return removed
+
+    def close(self):
+        with self._lock:
+            keys = list(self._local)
+            self._local.clear()
+        for key in keys:
+            self._drop_ref(key)
+
+
+def load_analyzer(store, key, cache_dir=None):
+    from neural_analysis import NeuralAnalyzer
+
+    entry = store.get(key)
+    if entry is None:
+        return None
+    arrays, meta = entry
+    return NeuralAnalyzer.from_state(arrays, meta, cache_dir=cache_dir), meta
+
+
+def save_analyzer(store, key, analyzer, extra_meta=None):
+    from neural_analysis import NeuralAnalyzer
+
+    arrays, meta = analyzer.get_state()
+    meta = {**meta, **(extra_meta or {})}
+    arrays, meta = store.put(key, arrays, meta)
+    # Возвращаем анализатор поверх общих массивов, а не приватную копию процесса
+    return NeuralAnalyzer.from_state(arrays, meta, cache_dir=analyzer.cache_dir), meta
+
+
+def _frame(arrays, meta):
+    import pandas as pd
+
+    return pd.DataFrame({column: arrays[f'col_{i}'] for i, column in enumerate(meta['columns'])}, copy=False)
+
+
+def load_frame(store, key):
+    entry = store.get(key)
+    if entry is None:
+        return None
+    return _frame(*entry)
+
+
+def save_frame(store, key, df):
+    # Сохраняются только числовые колонки; DataFrame с другими типами хранить нельзя
+    arrays = {f'col_{i}': df[column].to_numpy(dtype=np.float64) for i, column in enumerate(df.columns)}
+    return _frame(*store.put(key, arrays, {'columns': list(df.columns)}))
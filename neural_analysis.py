@@ -4,21 +4,74 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.neural_network import MLPRegressor
 from sklearn.metrics import mean_squared_error
 import io
+import os
+import hashlib
+import importlib.util
+import tempfile
+from instrumentation import timer
+
+CSV_COLUMNS = ['Deformation', 'Standard_Stress']
+# pyarrow парсит CSV быстрее всего, но это необязательная зависимость
+CSV_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+# Порядок параметров образца в признаках модели (после деформации)
+PARAM_NAMES = ['polymer_solution_pct', 'length_mm', 'mass_mg', 'fiber_content_pct']
+
+DEFAULT_MODEL_PARAMS = {'hidden_layer_sizes': (100, 100), 'max_iter': 5000, 'random_state': 0}
 
 class NeuralAnalyzer:
-    def __init__(self):
+    def __init__(self, cache_dir=None, model_params=None):
         self.scaler_X = StandardScaler()
         self.scaler_y = StandardScaler()
-        self.model = MLPRegressor(hidden_layer_sizes=(100, 100), max_iter=5000, random_state=0)
+        # model_params переопределяют параметры MLPRegressor (например, найденные neural_search)
+        self.model = MLPRegressor(**{**DEFAULT_MODEL_PARAMS, **(model_params or {})})
+        # Каталог для кэша распарсенных CSV (.npy), None — кэш отключён
+        self.cache_dir = cache_dir
+
+    def _read_bytes(self, csv_file):
+        if hasattr(csv_file, 'read'):
+            return csv_file.read()
+        with open(csv_file, 'rb') as f:
+            return f.read()
+
+    def _parse_csv(self, data):
+        with timer('neural.parse_csv'):
+            df = pd.read_csv(
+                io.BytesIO(data), sep=';', decimal=',',
+                usecols=CSV_COLUMNS, dtype=np.float64, engine=CSV_ENGINE
+            )
+        return np.vstack([df['Deformation'].to_numpy(), df['Standard_Stress'].to_numpy()])
 
+    def _load_csv(self, csv_file):
+        data = self._read_bytes(csv_file)
+        if self.cache_dir is None:
+            return self._parse_csv(data)
+
+        cache_path = os.path.join(self.cache_dir, hashlib.sha256(data).hexdigest() + '.npy')
+        if os.path.exists(cache_path):
+            return np.asarray(np.load(cache_path, mmap_mode='r'))
+
+        arrays = self._parse_csv(data)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Запись через временный файл, чтобы параллельные процессы не прочитали недописанный кэш
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, arrays)
+        os.replace(tmp_path, cache_path)
+        return arrays
+
+    @timer('neural.load_data')
     def load_data(self, csv_files):
-        all_eps_pct, all_stress = [], []
-        for csv_file in csv_files:
-            df = pd.read_csv(csv_file, sep=';', decimal=',', engine='python')
-            all_eps_pct.extend(df['Deformation'].values)
-            all_stress.extend(df['Standard_Stress'].values)
-        return np.array(all_eps_pct), np.array(all_stress)
+        arrays = [self._load_csv(csv_file) for csv_file in csv_files]
+        if not arrays:
+            return np.array([]), np.array([])
+        if len(arrays) == 1:
+            # Один файл: из кэша возвращаются отображённые в память массивы без копирования
+            return arrays[0][0], arrays[0][1]
+        stacked = np.concatenate(arrays, axis=1)
+        return stacked[0], stacked[1]
 
+    @timer('neural.fit')
     def fit(self, eps_pct, stress, params):
         VF = params['fiber_content_pct'] / 100.0
         E_eff = 240e3 * VF + 2.7e3 * (1 - VF)
@@ -45,35 +98,85 @@ class NeuralAnalyzer:
 
         return mse
 
+    def get_state(self):
+        # Обученное состояние как плоские массивы float64 и JSON-метаданные (для SharedModelStore)
+        arrays = {}
+        for name, scaler in (('X', self.scaler_X), ('y', self.scaler_y)):
+            arrays[f'scaler_{name}_mean'] = scaler.mean_
+            arrays[f'scaler_{name}_scale'] = scaler.scale_
+            arrays[f'scaler_{name}_var'] = scaler.var_
+        for i, (coef, intercept) in enumerate(zip(self.model.coefs_, self.model.intercepts_)):
+            arrays[f'coef_{i}'] = coef
+            arrays[f'intercept_{i}'] = intercept
+        meta = {
+            'model_params': self.model.get_params(),
+            'n_layers': self.model.n_layers_,
+            'n_outputs': self.model.n_outputs_,
+            'out_activation': self.model.out_activation_,
+            'n_samples_seen_X': int(self.scaler_X.n_samples_seen_),
+            'n_samples_seen_y': int(self.scaler_y.n_samples_seen_)
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_state(cls, arrays, meta, cache_dir=None):
+        # Массивы используются как есть, без копирования — в том числе отображённые в память
+        analyzer = cls(cache_dir=cache_dir, model_params=meta['model_params'])
+        for name, scaler in (('X', analyzer.scaler_X), ('y', analyzer.scaler_y)):
+            scaler.mean_ = arrays[f'scaler_{name}_mean']
+            scaler.scale_ = arrays[f'scaler_{name}_scale']
+            scaler.var_ = arrays[f'scaler_{name}_var']
+            scaler.n_features_in_ = len(scaler.mean_)
+            scaler.n_samples_seen_ = meta[f'n_samples_seen_{name}']
+        model = analyzer.model
+        model.coefs_ = [arrays[f'coef_{i}'] for i in range(meta['n_layers'] - 1)]
+        model.intercepts_ = [arrays[f'intercept_{i}'] for i in range(meta['n_layers'] - 1)]
+        model.n_layers_ = meta['n_layers']
+        model.n_outputs_ = meta['n_outputs']
+        model.out_activation_ = meta['out_activation']
+        model.n_features_in_ = model.coefs_[0].shape[0]
+        return analyzer
+
     def predict_curve(self, eps_range, params, num_points=300):
         eps_test = np.linspace(eps_range[0], eps_range[1], num_points)
-        VF = params['fiber_content_pct'] / 100.0
-        E_eff = 240e3 * VF + 2.7e3 * (1 - VF)
-        X_test = np.vstack([
-            eps_test,
-            np.full_like(eps_test, params['polymer_solution_pct']),
-            np.full_like(eps_test, params['length_mm']),
-            np.full_like(eps_test, params['mass_mg']),
-            np.full_like(eps_test, params['fiber_content_pct'])
-        ]).T
+        return eps_test, self.predict(eps_test, params)
+
+    def predict(self, eps_test, params):
+        params_matrix = np.array([[params[name] for name in PARAM_NAMES]], dtype=np.float64)
+        return self.predict_batch(eps_test, params_matrix)[0]
+
+    def predict_batch(self, eps_test, params_matrix):
+        # Кривые сразу для пачки образцов одним вызовом модели;
+        # params_matrix — (n_образцов, 4) в порядке PARAM_NAMES, результат — (n_образцов, len(eps_test))
+        eps_test = np.asarray(eps_test, dtype=np.float64)
+        params_matrix = np.asarray(params_matrix, dtype=np.float64)
+        n_specimens, n_points = len(params_matrix), len(eps_test)
+
+        X_test = np.empty((n_specimens * n_points, 1 + len(PARAM_NAMES)))
+        X_test[:, 0] = np.tile(eps_test, n_specimens)
+        X_test[:, 1:] = np.repeat(params_matrix, n_points, axis=0)
 
         predicted_residual = self.model.predict(self.scaler_X.transform(X_test)).reshape(-1, 1)
-        resid_test = self.scaler_y.inverse_transform(predicted_residual).flatten()
+        resid_test = self.scaler_y.inverse_transform(predicted_residual).reshape(n_specimens, n_points)
 
-        stress_predicted = E_eff * eps_test / 100.0 + resid_test
-        return eps_test, stress_predicted
+        VF = params_matrix[:, PARAM_NAMES.index('fiber_content_pct')] / 100.0
+        E_eff = 240e3 * VF + 2.7e3 * (1 - VF)
+        stress_predicted = E_eff[:, None] * eps_test[None, :] / 100.0 + resid_test
+        return stress_predicted
 
+    @timer('neural.generate_multiple_samples')
     def generate_multiple_samples(self, params_list, eps_range, num_points=300):
         samples = {}
-        for idx, params in enumerate(params_list, start=1):
-            eps_test, stress_predicted = self.predict_curve(eps_range, params, num_points)
-            samples[f"Sample_{idx}"] = pd.DataFrame({
-                "Deformation (%)": eps_test,
-                "Predicted Stress (MPa)": stress_predicted.flatten()
-            })
+        with timer('neural.predict'):
+            for idx, params in enumerate(params_list, start=1):
+                eps_test, stress_predicted = self.predict_curve(eps_range, params, num_points)
+                samples[f"Sample_{idx}"] = pd.DataFrame({
+                    "Deformation (%)": eps_test,
+                    "Predicted Stress (MPa)": stress_predicted.flatten()
+                })
 
         excel_buffer = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+        with timer('neural.write_excel'), pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
             for sheet_name, df_sample in samples.items():
                 df_sample.to_excel(writer, sheet_name=sheet_name, index=False)
         excel_buffer.seek(0)
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import warnings
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.metrics import mean_squared_error
+from neural_analysis import NeuralAnalyzer, DEFAULT_MODEL_PARAMS
+from instrumentation import timer
+
+SEARCH_SPACE = {
+    'hidden_layer_sizes': [(16,), (32,), (64,), (32, 32), (64, 64), (100, 100)],
+    'alpha': [1e-5, 1e-4, 1e-3],
+    'learning_rate_init': [1e-3, 3e-3, 1e-2],
+    'solver': ['adam', 'lbfgs']
+}
+
+SEARCH_MODES = ('grid', 'random', 'halving')
+
+N_FEATURES = 5
+
+
+def count_weights(hidden_layer_sizes):
+    # Размер сети: веса и смещения всех слоёв, от 5 признаков до одного выхода
+    sizes = [N_FEATURES] + list(hidden_layer_sizes) + [1]
+    return sum((n_in + 1) * n_out for n_in, n_out in zip(sizes[:-1], sizes[1:]))
+
+
+def _normalize(candidate):
+    candidate = dict(candidate)
+    candidate['hidden_layer_sizes'] = tuple(candidate['hidden_layer_sizes'])
+    if candidate.get('solver') == 'lbfgs':
+        # lbfgs не использует learning_rate_init — такие кандидаты совпадают
+        candidate.pop('learning_rate_init', None)
+    return candidate
+
+
+def _unique(candidates):
+    seen, result = set(), []
+    for candidate in map(_normalize, candidates):
+        key = json.dumps(candidate, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            result.append(candidate)
+    return result
+
+
+def grid_candidates(space):
+    keys = list(space)
+    return _unique(dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys)))
+
+
+def random_candidates(space, n_iter, random_state=0):
+    grid = grid_candidates(space)
+    rng = np.random.default_rng(random_state)
+    idx = rng.choice(len(grid), size=min(n_iter, len(grid)), replace=False)
+    return [grid[i] for i in sorted(idx)]
+
+
+def data_hash(eps_pct, stress, params):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(eps_pct, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(stress, dtype=np.float64).tobytes())
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def train_test_split_indices(n, test_size=0.2, random_state=0):
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(n)
+    n_test = max(1, int(round(n * test_size)))
+    return np.sort(order[n_test:]), np.sort(order[:n_test])
+
+
+def _evaluate(task):
+    # Выполняется в дочернем процессе, поэтому функция модульного уровня
+    candidate, max_iter, eps_train, stress_train, eps_test, stress_test, params = task
+    analyzer = NeuralAnalyzer(model_params={**candidate, 'max_iter': max_iter})
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        # На урезанном max_iter (successive halving) MLP не обязан сходиться
+        warnings.simplefilter('ignore')
+        analyzer.fit(eps_train, stress_train, params)
+    fit_seconds = time.perf_counter() - start
+    return {
+        'mse': float(mean_squared_error(stress_test, analyzer.predict(eps_test, params))),
+        'fit_seconds': fit_seconds
+    }
+
+
+class HyperparameterSearch:
+    def __init__(self, mode='random', space=None, n_iter=20, mse_target=None, test_size=0.2,
+                 max_iter=DEFAULT_MODEL_PARAMS['max_iter'], min_iter=200, eta=3,
+                 n_jobs=None, cache_dir=None, random_state=0):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Неизвестный режим поиска '{mode}', ожидается один из {SEARCH_MODES}")
+        if n_iter < 1:
+            raise ValueError("n_iter должен быть не меньше 1")
+        if n_jobs is not None and n_jobs < 1:
+            raise ValueError("n_jobs должен быть не меньше 1")
+        self.mode = mode
+        self.space = space or SEARCH_SPACE
+        self.n_iter = n_iter
+        self.mse_target = mse_target
+        self.test_size = test_size
+        self.max_iter = max_iter
+        self.min_iter = min_iter
+        self.eta = eta
+        self.n_jobs = n_jobs
+        # Каталог для кэша оценок кандидатов (JSON по хэшу данных), None — кэш отключён
+        self.cache_dir = cache_dir
+        self.random_state = random_state
+
+    def _candidates(self):
+        if self.mode == 'grid':
+            return grid_candidates(self.space)
+        return random_candidates(self.space, self.n_iter, self.random_state)
+
+    def _cache_path(self, data_key, candidate, max_iter):
+        key = json.dumps({
+            'data': data_key, 'candidate': candidate, 'max_iter': max_iter,
+            'test_size': self.test_size, 'random_state': self.random_state
+        }, sort_keys=True)
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_cache(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, path, score):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(score, f)
+        os.replace(tmp_path, path)
+
+    def _evaluate_round(self, candidates, max_iter, split, data_key, params, executor):
+        eps_train, stress_train, eps_test, stress_test = split
+        scores, pending = [None] * len(candidates), []
+        for i, candidate in enumerate(candidates):
+            if self.cache_dir is not None:
+                cached = self._read_cache(self._cache_path(data_key, candidate, max_iter))
+                if cached is not None:
+                    scores[i] = {**cached, 'cached': True}
+                    continue
+            pending.append(i)
+
+        tasks = [(candidates[i], max_iter, eps_train, stress_train, eps_test, stress_test, params) for i in pending]
+        for i, score in zip(pending, executor.map(_evaluate, tasks)):
+            if self.cache_dir is not None:
+                self._write_cache(self._cache_path(data_key, candidates[i], max_iter), score)
+            scores[i] = {**score, 'cached': False}
+
+        return [
+            {
+                **candidate,
+                'hidden_layer_sizes': list(candidate['hidden_layer_sizes']),
+                'max_iter': max_iter,
+                'n_weights': count_weights(candidate['hidden_layer_sizes']),
+                **score
+            }
+            for candidate, score in zip(candidates, scores)
+        ]
+
+    def _select(self, results):
+        # Самая маленькая сеть, укладывающаяся в mse_target; без цели или если никто не уложился — лучшая по MSE
+        if self.mse_target is not None:
+            suitable = [r for r in results if r['mse'] <= self.mse_target]
+            if suitable:
+                return min(suitable, key=lambda r: (r['n_weights'], r['mse'])), True
+        return min(results, key=lambda r: r['mse']), False
+
+    @timer('neural.search')
+    def run(self, eps_pct, stress, params):
+        eps_pct, stress = np.asarray(eps_pct, dtype=np.float64), np.asarray(stress, dtype=np.float64)
+        train_idx, test_idx = train_test_split_indices(len(eps_pct), self.test_size, self.random_state)
+        split = (eps_pct[train_idx], stress[train_idx], eps_pct[test_idx], stress[test_idx])
+        data_key = data_hash(eps_pct, stress, params)
+
+        candidates = self._candidates()
+        history = []
+        # Поиск запускается из пула потоков uvicorn: fork мог бы унести в дочерний процесс
+        # блокировку метрик, занятую другим потоком, поэтому процессы стартуют через forkserver
+        context = multiprocessing.get_context('forkserver' if os.name != 'nt' else 'spawn')
+        with ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=context) as executor:
+            if self.mode == 'halving':
+                budget = min(self.min_iter, self.max_iter)
+                while len(candidates) > 1 and budget < self.max_iter:
+                    results = self._evaluate_round(candidates, budget, split, data_key, params, executor)
+                    history.extend(results)
+                    keep = max(1, len(candidates) // self.eta)
+                    order = sorted(range(len(results)), key=lambda i: results[i]['mse'])[:keep]
+                    if self.mse_target is not None:
+                        # Лучшие по MSE — обычно большие сети; чтобы _select мог выбрать маленькую,
+                        # дальше проходят и самые маленькие из уложившихся в mse_target
+                        suitable = [i for i in range(len(results)) if results[i]['mse'] <= self.mse_target]
+                        suitable.sort(key=lambda i: (results[i]['n_weights'], results[i]['mse']))
+                        order += [i for i in suitable[:keep] if i not in order]
+                    candidates = [candidates[i] for i in order]
+                    budget *= self.eta
+            results = self._evaluate_round(candidates, self.max_iter, split, data_key, params, executor)
+            history.extend(results)
+
+        best, meets_target = self._select(results)
+        model_params = {
+            key: best[key] for key in ('hidden_layer_sizes', 'alpha', 'learning_rate_init', 'solver', 'max_iter')
+            if key in best
+        }
+        model_params['hidden_layer_sizes'] = tuple(model_params['hidden_layer_sizes'])
+        return {
+            'best': best,
+            'model_params': model_params,
+            'meets_target': meets_target,
+            'candidates': history
+        }
@@ -0,0 +1,111 @@
+import math
+import numpy as np
+from neural_analysis import PARAM_NAMES
+from instrumentation import timer
+
+SWEEP_DESIGNS = ('grid', 'lhs')
+
+# Пачка держит batch_size × num_points напряжений и столько же строк CSV
+MAX_BATCH_SIZE = 4096
+
+# План LHS и результаты /virtual-validation/ хранятся целиком, поэтому размер плана ограничен
+MAX_SWEEP_SIZE = 1_000_000
+
+# Разброс по умолчанию вокруг базовых параметров — как у /neural-analysis/
+DEFAULT_SPREAD = {'polymer_solution_pct': 1.0, 'length_mm': 0.0, 'mass_mg': 0.0, 'fiber_content_pct': 2.0}
+
+
+def sweep_ranges(base_params, bounds):
+    # bounds: {параметр: (минимум или None, максимум или None)}
+    ranges = {}
+    for name in PARAM_NAMES:
+        low, high = bounds.get(name, (None, None))
+        ranges[name] = (
+            base_params[name] - DEFAULT_SPREAD[name] if low is None else low,
+            base_params[name] + DEFAULT_SPREAD[name] if high is None else high
+        )
+    return ranges
+
+
+class GridDesign:
+    # Полный факторный план: levels точек на каждый параметр с min < max.
+    # Точки вычисляются по номеру, поэтому план любого размера не хранится в памяти
+    def __init__(self, ranges, levels=10):
+        self.axes = [
+            np.linspace(low, high, levels) if high > low else np.array([low], dtype=np.float64)
+            for low, high in (ranges[name] for name in PARAM_NAMES)
+        ]
+        self.shape = tuple(len(axis) for axis in self.axes)
+        # Целые Python не переполняются, в отличие от np.prod в int64
+        self.size = math.prod(self.shape)
+
+    def batch(self, start, stop):
+        idx = np.unravel_index(np.arange(start, stop), self.shape)
+        return np.column_stack([axis[i] for axis, i in zip(self.axes, idx)])
+
+
+class LatinHypercubeDesign:
+    # Латинский гиперкуб: каждый параметр делится на size равных страт,
+    # в каждую страту попадает ровно один образец. Хранятся только точки
+    # единичного куба (32 байта на образец), кривые считаются пачками
+    def __init__(self, ranges, size, seed=0):
+        rng = np.random.default_rng(seed)
+        self.size = size
+        self.low = np.array([ranges[name][0] for name in PARAM_NAMES], dtype=np.float64)
+        self.span = np.array([ranges[name][1] - ranges[name][0] for name in PARAM_NAMES], dtype=np.float64)
+        strata = np.column_stack([rng.permutation(size) for _ in PARAM_NAMES])
+        self.unit_points = (strata + rng.random((size, len(PARAM_NAMES)))) / size
+
+    def batch(self, start, stop):
+        return self.low + self.unit_points[start:stop] * self.span
+
+
+def make_design(design, ranges, n_samples=1000, levels=10, seed=0):
+    for name in PARAM_NAMES:
+        low, high = ranges[name]
+        if high < low:
+            raise ValueError(f"Параметр '{name}': минимум {low} больше максимума {high}")
+    if design == 'grid':
+        size = math.prod(levels if high > low else 1 for low, high in (ranges[name] for name in PARAM_NAMES))
+    elif design == 'lhs':
+        size = n_samples
+    else:
+        raise ValueError(f"Неизвестный план '{design}', ожидается один из {SWEEP_DESIGNS}")
+    # Проверяется до построения плана, чтобы эндпоинт ответил 400 до начала потока
+    if size > MAX_SWEEP_SIZE:
+        raise ValueError(f"План из {size} образцов больше допустимых {MAX_SWEEP_SIZE}")
+    if design == 'grid':
+        return GridDesign(ranges, levels)
+    return LatinHypercubeDesign(ranges, n_samples, seed)
+
+
+def iter_sweep(analyzer, design, eps_test, batch_size=256):
+    for start in range(0, design.size, batch_size):
+        stop = min(start + batch_size, design.size)
+        params_matrix = design.batch(start, stop)
+        with timer('neural.sweep_batch'):
+            stress = analyzer.predict_batch(eps_test, params_matrix)
+        yield start, params_matrix, stress
+
+
+def _format_cells(values):
+    # repr даёт кратчайшую точную запись числа; десятичная запятая как во входных CSV
+    return [repr(value).replace('.', ',') for value in np.asarray(values, dtype=np.float64).tolist()]
+
+
+def stream_sweep_csv(analyzer, design, eps_test, batch_size=256):
+    # CSV в формате входных данных: разделитель ';', десятичная запятая,
+    # по одной строке на точку кривой; память ограничена размером пачки.
+    # Ячейки параметров и деформаций повторяются, поэтому форматируются один раз
+    eps_test = np.asarray(eps_test, dtype=np.float64)
+    n_points = len(eps_test)
+    eps_cells = [cell + ';' for cell in _format_cells(eps_test)]
+    yield (';'.join(['Specimen'] + PARAM_NAMES + ['Deformation', 'Predicted_Stress']) + '\n').encode('utf-8')
+    for start, params_matrix, stress in iter_sweep(analyzer, design, eps_test, batch_size):
+        stress_cells = _format_cells(stress.ravel())
+        lines = []
+        for k, params in enumerate(params_matrix):
+            prefix = ';'.join([str(start + k + 1)] + _format_cells(params)) + ';'
+            row = stress_cells[k * n_points:(k + 1) * n_points]
+            lines.extend(prefix + eps_cell + stress_cell for eps_cell, stress_cell in zip(eps_cells, row))
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
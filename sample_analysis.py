@@ -1,4 +1,5 @@
 import pandas as pd
+from instrumentation import timer
 
 def analyze_single_dataframe(df: pd.DataFrame, sheet_name: str = ""):
     if df.shape[1] < 2:
@@ -26,13 +27,16 @@ def analyze_single_dataframe(df: pd.DataFrame, sheet_name: str = ""):
         'is_good_sample': not final_drop and has_peak
     }
 
+@timer('sample.analyze_excel_file')
 def analyze_excel_file(path: str, skip_initial_rows: int = 3):
     results = []
     with pd.ExcelFile(path) as xls:
         for sheet_name in xls.sheet_names:
             try:
-                df = pd.read_excel(xls, sheet_name=sheet_name, header=None, skiprows=skip_initial_rows)
-                result = analyze_single_dataframe(df, sheet_name)
+                with timer('sample.read_sheet'):
+                    df = pd.read_excel(xls, sheet_name=sheet_name, header=None, skiprows=skip_initial_rows)
+                with timer('sample.analyze_sheet'):
+                    result = analyze_single_dataframe(df, sheet_name)
             except Exception as e:
                 result = {
                     'sheet': sheet_name,
@@ -0,0 +1,61 @@
+import json
+from fastapi.responses import JSONResponse
+
+# orjson кодирует в разы быстрее стандартного json и умеет массивы numpy, но необязателен
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LAYOUTS = ('rows', 'columnar')
+
+
+def _default(obj):
+    # Скаляры и массивы numpy; сам numpy здесь не импортируется, чтобы не замедлять старт API
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Тип {type(obj).__name__} не сериализуется в JSON")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        if orjson is not None:
+            return orjson.dumps(
+                content, default=_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+        ).encode('utf-8')
+
+
+def shape_analysis_result(result, layout='rows', offset=0, limit=None):
+    # layout='columnar': matched_experiments и metrics_raw отдаются массивами по полям
+    # вместо списка словарей и пар (реальное, виртуальное) — ответ в разы компактнее.
+    # offset/limit режут только matched_experiments, метрики считаются по всем совпадениям
+    import numpy as np
+    from classic_analysis import MATCH_TABLE_FIELDS
+
+    if layout not in LAYOUTS:
+        raise ValueError(f"Неизвестный формат '{layout}', ожидается один из {LAYOUTS}")
+
+    rows = result['matched_experiments']
+    page = rows[offset:] if limit is None else rows[offset:offset + limit]
+    shaped = dict(result)
+
+    if layout == 'columnar':
+        shaped['matched_experiments'] = {
+            field: np.fromiter((row[field] for row in page), dtype=np.float64, count=len(page))
+            for field in MATCH_TABLE_FIELDS
+        }
+        shaped['metrics_raw'] = {}
+        for param, pairs in result['metrics_raw'].items():
+            # Столбцы values[:, 0] — срезы с шагом, orjson сериализует только C-непрерывные массивы
+            real, virt = np.ascontiguousarray(np.asarray(pairs, dtype=np.float64).reshape(-1, 2).T)
+            shaped['metrics_raw'][param] = {'real': real, 'virt': virt}
+    else:
+        shaped['matched_experiments'] = page
+
+    if offset or limit is not None:
+        shaped['pagination'] = {'offset': offset, 'limit': limit, 'total': len(rows)}
+    return shaped
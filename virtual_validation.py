@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from neural_analysis import PARAM_NAMES
+from parameter_sweep import iter_sweep
+from instrumentation import timer
+
+# Плотности углеродного волокна и полисульфоновой матрицы, г/см³ (= мг/мм³)
+FIBER_DENSITY = 1.76
+MATRIX_DENSITY = 1.24
+
+# Участок деформации (%) для секущего модуля упругости, как в ISO 527
+MODULUS_WINDOW = (0.05, 0.25)
+
+
+def _modulus_mask(eps_pct, window):
+    mask = (eps_pct >= window[0]) & (eps_pct <= window[1])
+    if mask.sum() < 2:
+        # Кривая не покрывает окно — берём начальные 10% точек
+        mask = np.zeros_like(eps_pct, dtype=bool)
+        mask[:max(2, len(eps_pct) // 10)] = True
+    return mask
+
+
+def extract_properties(eps_pct, stress, params_matrix, density_g_cm3=None, modulus_window=MODULUS_WINDOW):
+    # Сводные свойства пачки кривых в колонках ClassicAnalyzer:
+    # stress — (n_образцов, n_точек) в МПа на общей сетке eps_pct (%)
+    eps_pct = np.asarray(eps_pct, dtype=np.float64)
+    stress = np.asarray(stress, dtype=np.float64)
+    params = dict(zip(PARAM_NAMES, np.asarray(params_matrix, dtype=np.float64).T))
+
+    idx_peak = np.argmax(stress, axis=1)
+    strength = stress[np.arange(len(stress)), idx_peak]
+    elongation = eps_pct[idx_peak]
+
+    # Наклон МНК на участке модуля; МПа/% -> ГПа делением на 10
+    mask = _modulus_mask(eps_pct, modulus_window)
+    eps_window = eps_pct[mask] - eps_pct[mask].mean()
+    stress_window = stress[:, mask] - stress[:, mask].mean(axis=1, keepdims=True)
+    E_modulus = stress_window @ eps_window / (eps_window @ eps_window) / 10.0
+
+    # Площадь сечения из массы и длины: A = m / (ρ·L), мм²
+    if density_g_cm3 is None:
+        VF = params['fiber_content_pct'] / 100.0
+        density_g_cm3 = FIBER_DENSITY * VF + MATRIX_DENSITY * (1 - VF)
+    area_mm2 = params['mass_mg'] / (density_g_cm3 * params['length_mm'])
+
+    return pd.DataFrame({
+        'fiber_percent': params['fiber_content_pct'],
+        'E_modulus_GPa': E_modulus,
+        'Fmax_N': strength * area_mm2,
+        'strength_MPa': strength,
+        'elongation_percent': elongation,
+        'polymer_percent': params['polymer_solution_pct']
+    })
+
+
+class SnappedDesign:
+    # match_data сравнивает образцы только при точном совпадении раствора полимера,
+    # поэтому значения полимера из плана притягиваются к ближайшему уровню реальных данных
+    def __init__(self, design, polymer_levels):
+        self.design = design
+        self.size = design.size
+        self.levels = np.unique(np.asarray(polymer_levels, dtype=np.float64))
+        self.column = PARAM_NAMES.index('polymer_solution_pct')
+
+    def batch(self, start, stop):
+        params_matrix = self.design.batch(start, stop)
+        values = params_matrix[:, self.column]
+        nearest = np.abs(values[:, None] - self.levels[None, :]).argmin(axis=1)
+        params_matrix[:, self.column] = self.levels[nearest]
+        return params_matrix
+
+
+def virtual_properties(analyzer, design, eps_test, batch_size=256, density_g_cm3=None):
+    # Кривые считаются пачками и сразу сворачиваются в свойства, целиком не хранятся
+    frames = []
+    for _, params_matrix, stress in iter_sweep(analyzer, design, eps_test, batch_size):
+        with timer('validation.extract_properties'):
+            frames.append(extract_properties(eps_test, stress, params_matrix, density_g_cm3))
+    return pd.concat(frames, ignore_index=True)
+
+
+def validate_against_real(classic_analyzer, analyzer, design, eps_test, df_real, batch_size=256, density_g_cm3=None):
+    polymer_levels = df_real['polymer_percent'].dropna().unique()
+    if len(polymer_levels):
+        design = SnappedDesign(design, polymer_levels)
+    df_virt = virtual_properties(analyzer, design, eps_test, batch_size, density_g_cm3)
+    result = classic_analyzer.analyze_frames(df_virt, df_real)
+    result['virtual_count'] = len(df_virt)
+    return result
@@ -0,0 +1,75 @@
+import io
+import threading
+import warnings
+from instrumentation import timer
+
+_state = {'started': False, 'done': False, 'error': None}
+_lock = threading.Lock()
+
+
+def status():
+    return dict(_state)
+
+
+def warm_up():
+    # Импортирует анализаторы и прогоняет их горячие пути на крошечных данных,
+    # чтобы первый настоящий запрос не платил за ленивые импорты pandas/sklearn/scipy/openpyxl
+    with timer('api.warmup'):
+        import numpy as np
+        import pandas as pd
+        from classic_analysis import ClassicAnalyzer
+        from neural_analysis import NeuralAnalyzer
+        from sample_analysis import analyze_single_dataframe
+
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'fiber_percent': rng.uniform(60.0, 80.0, 8),
+            'E_modulus_GPa': rng.uniform(100.0, 140.0, 8),
+            'Fmax_N': rng.uniform(400.0, 600.0, 8),
+            'strength_MPa': rng.uniform(1000.0, 1500.0, 8),
+            'elongation_percent': rng.uniform(1.0, 1.5, 8),
+            'polymer_percent': 20.0
+        })
+        classic = ClassicAnalyzer(error_threshold=1000)
+        excel_buffer = io.BytesIO()
+        df.to_excel(excel_buffer, sheet_name='Результаты', index=False)
+        excel_buffer.seek(0)
+        df_loaded = classic.load_data(excel_buffer, {})
+        results_metrics, _, metrics_raw = classic.calculate_metrics(classic.match_data(df_loaded, df))
+        classic.statistical_tests(metrics_raw)
+        classic.evaluate_metrics(results_metrics)
+
+        eps = np.linspace(0.0, 1.2, 50)
+        stress = 1750.0 * eps + rng.normal(0.0, 5.0, eps.size)
+        analyze_single_dataframe(pd.DataFrame({0: eps, 1: stress}), 'warmup')
+        csv_buffer = io.BytesIO(
+            pd.DataFrame({'Deformation': eps, 'Standard_Stress': stress})
+            .to_csv(sep=';', decimal=',', index=False).encode('utf-8')
+        )
+
+        neural = NeuralAnalyzer()
+        eps_pct, stress_pct = neural.load_data([csv_buffer])
+        neural.model.set_params(max_iter=10)
+        params = {'polymer_solution_pct': 20.0, 'length_mm': 236.0, 'mass_mg': 261.0, 'fiber_content_pct': 72.34}
+        with warnings.catch_warnings():
+            # На 10 итерациях MLP не сходится, для прогрева это ожидаемо
+            warnings.simplefilter('ignore')
+            neural.fit(eps_pct, stress_pct, params)
+        neural.generate_multiple_samples([params], (0.0, 1.2), num_points=10)
+
+
+def _run():
+    try:
+        warm_up()
+    except Exception as e:
+        _state['error'] = str(e)
+    finally:
+        _state['done'] = True
+
+
+def start_background_warmup():
+    with _lock:
+        if _state['started']:
+            return
+        _state['started'] = True
+    threading.Thread(target=_run, name='api-warmup', daemon=True).start()